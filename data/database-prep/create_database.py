@@ -1,19 +1,36 @@
 import sqlite3
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime
 
 class SupplyChainDB:
-    # Maps table names to their primary key columns so duplicates can be dropped before insert
-    PRIMARY_KEYS = {
-        "vendor": ["vendor_id"],
-        "product": ["sku_id"],
-        "warehouse": ["warehouse_id"],
-        "purchase_order": ["po_id"],
-        "shipment": ["shipment_id"],
-        "inventory": ["warehouse_id", "sku_id"],
-        "demand": ["date", "sku_id"],
-    }
+    # Steady-state tuning for reader connections. journal_mode=WAL is
+    # persistent in the database file (set once in create_tables); the rest
+    # only last for the lifetime of a connection, so re-apply them on connect.
+    CONNECTION_PRAGMAS = """
+        PRAGMA synchronous = NORMAL;
+        PRAGMA mmap_size = 268435456;
+        PRAGMA cache_size = -16384;
+        PRAGMA temp_store = MEMORY;
+    """
+
+    # PRAGMAs that trade durability for bulk-insert throughput: no fsync, no
+    # rollback journal on disk, and a large page cache. Only used for the load
+    # phase; the WAL configuration is restored once the load commits.
+    # foreign_keys is turned off so the per-table DELETE takes SQLite's
+    # truncate optimization instead of walking every row firing FK checks;
+    # tables are loaded in FK order and filtered via the staging semi-join,
+    # so integrity is preserved.
+    BULK_LOAD_PRAGMAS = """
+        PRAGMA foreign_keys = OFF;
+        PRAGMA journal_mode = MEMORY;
+        PRAGMA synchronous = OFF;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA locking_mode = EXCLUSIVE;
+        PRAGMA cache_size = -65536;
+    """
+
     def __init__(self, db_path: str = "data/database/supply_chain.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -23,12 +40,60 @@ class SupplyChainDB:
         """Establish database connection"""
         self.conn = sqlite3.connect(self.db_path)
         self.conn.execute("PRAGMA foreign_keys = ON;")
+        self.conn.executescript(self.CONNECTION_PRAGMAS)
         return self.conn
 
+    def _bulk_connect(self):
+        """Establish a connection tuned for bulk inserts"""
+        conn = self.connect()
+        conn.executescript(self.BULK_LOAD_PRAGMAS)
+        return conn
+
+    def finish_bulk_load(self):
+        """Restore the steady-state WAL configuration and close the bulk
+        connection once all tables are loaded"""
+        if self.conn:
+            self.conn.executescript(
+                "PRAGMA foreign_keys = ON; PRAGMA journal_mode = WAL; PRAGMA synchronous = NORMAL;")
+            self.close()
+
+    def _bulk_insert(self, conn, table_name: str, df: pd.DataFrame, chunk_size: int = 10_000):
+        """Insert a DataFrame with chunked executemany (much faster than to_sql)"""
+        # Stringify datetime columns up front so the sqlite3 adapter layer
+        # doesn't call isoformat() once per cell
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+        # OR IGNORE lets the primary-key B-tree reject duplicate rows during
+        # insertion, so no separate dedup pass over the DataFrame is needed
+        columns = ", ".join(df.columns)
+        placeholders = ", ".join("?" * len(df.columns))
+        sql = f"INSERT OR IGNORE INTO {table_name} ({columns}) VALUES ({placeholders})"
+        # zip over the raw numpy column arrays: each yields its scalars
+        # directly to the sqlite3 binding layer, skipping the per-row tuple
+        # construction pandas does inside itertuples. Integer/bool columns
+        # are bulk-converted with tolist() because their numpy scalars
+        # expose the buffer protocol and would bind as BLOBs; np.float64 is
+        # a float subclass and binds as REAL without boxing.
+        column_arrays = []
+        for col in df.columns:
+            arr = df[col].to_numpy()
+            column_arrays.append(arr.tolist() if arr.dtype.kind in 'iub' else arr)
+        inserted = 0
+        for start in range(0, len(df), chunk_size):
+            rows = zip(*(arr[start:start + chunk_size] for arr in column_arrays))
+            cursor = conn.executemany(sql, rows)
+            inserted += cursor.rowcount
+        return inserted
+
     def close(self):
         """Close database connection"""
         if self.conn:
+            # Refresh planner statistics where SQLite thinks it's worthwhile
+            self.conn.execute("PRAGMA optimize;")
             self.conn.close()
+            self.conn = None
 
     def create_tables(self):
         """Create database tables with constraints and indexes"""
@@ -46,8 +111,8 @@ class SupplyChainDB:
             defect_rate REAL CHECK (defect_rate BETWEEN 0 AND 1),
             lead_time_days INTEGER CHECK (lead_time_days >= 0),
             quality_score REAL CHECK (quality_score BETWEEN 0 AND 5),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch())
         );
 
         ------------------------------
@@ -56,8 +121,8 @@ class SupplyChainDB:
         CREATE TABLE IF NOT EXISTS warehouse (
             warehouse_id TEXT PRIMARY KEY,
             location TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch())
         );
 
         ------------------------------
@@ -66,8 +131,8 @@ class SupplyChainDB:
         CREATE TABLE IF NOT EXISTS product (
             sku_id TEXT PRIMARY KEY,
             product_type TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch())
         );
 
         ------------------------------
@@ -83,8 +148,8 @@ class SupplyChainDB:
             actual_receipt_qty REAL CHECK (actual_receipt_qty >= 0),
             inspection_results TEXT CHECK (inspection_results IN ('pass', 'fail', 'pending')),
             manufacturing_costs REAL CHECK (manufacturing_costs >= 0),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch()),
 
             FOREIGN KEY (sku_id) REFERENCES product(sku_id) ON DELETE CASCADE,
             FOREIGN KEY (vendor_id) REFERENCES vendor(vendor_id) ON DELETE CASCADE,
@@ -104,8 +169,8 @@ class SupplyChainDB:
             reorder_point INTEGER NOT NULL DEFAULT 0 CHECK (reorder_point >= 0),
             safety_stock INTEGER NOT NULL DEFAULT 0 CHECK (safety_stock >= 0),
 
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch()),
 
             PRIMARY KEY (warehouse_id, sku_id),
 
@@ -132,8 +197,8 @@ class SupplyChainDB:
             shipping_time_days INTEGER CHECK (shipping_time_days >= 0),
             shipping_cost REAL CHECK (shipping_cost >= 0),
             
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch()),
 
             CHECK (actual_delivery_date IS NULL OR actual_delivery_date >= event_timestamp),
 
@@ -153,8 +218,8 @@ class SupplyChainDB:
             web_traffic INTEGER CHECK (web_traffic >= 0),
             units_sold INTEGER CHECK (units_sold >= 0),
 
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER DEFAULT (unixepoch()),
+            updated_at INTEGER DEFAULT (unixepoch()),
 
             PRIMARY KEY (date, sku_id),
 
@@ -162,8 +227,27 @@ class SupplyChainDB:
         );
 
         ------------------------------
-        -- Indexes
+        -- Tuning
         ------------------------------
+        -- WAL allows concurrent readers for the downstream agent code and
+        -- synchronous=NORMAL cuts fsync pressure; see CONNECTION_PRAGMAS.
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA mmap_size = 268435456;
+        PRAGMA cache_size = -16384;
+        PRAGMA temp_store = MEMORY;
+
+        """)
+        # Close so the bulk-load connections can change journal mode, which
+        # requires no other handles on the database
+        self.close()
+
+    def create_indexes(self):
+        """Create secondary indexes, after bulk load so inserts don't pay
+        per-row index maintenance (PRIMARY KEY indexes are unavoidable)"""
+        with self.connect() as conn:
+            conn.executescript("""
+
         CREATE INDEX IF NOT EXISTS idx_po_sku ON purchase_order(sku_id);
         CREATE INDEX IF NOT EXISTS idx_po_vendor ON purchase_order(vendor_id);
         CREATE INDEX IF NOT EXISTS idx_po_dates ON purchase_order(po_date, promised_delivery_date);
@@ -178,73 +262,92 @@ class SupplyChainDB:
         CREATE INDEX IF NOT EXISTS idx_demand_sku ON demand(sku_id);
 
         """)
+        self.close()
 
 
-    def load_data_from_csv(self, table_name: str, csv_path: Path, date_columns=None, fk_filters=None):
-        """Load data from CSV into specified table, replacing existing data"""
-        if not csv_path.exists():
-            print(f"Warning: {csv_path} not found. Skipping {table_name} data load.")
+    def load_data_from_parquet(self, table_name: str, parquet_path: Path, date_columns=None, fk_filters=None):
+        """Load data from Parquet into specified table, replacing existing data"""
+        if not parquet_path.exists():
+            print(f"Warning: {parquet_path} not found. Skipping {table_name} data load.")
             return
 
-        print(f"Loading {table_name} data from {csv_path}...")
-        df = pd.read_csv(csv_path)
-        
-        pk_subset = self.PRIMARY_KEYS.get(table_name)
-        duplicates = df.duplicated(subset=pk_subset)
-        if duplicates.any():
-            print(f"Warning: Found {duplicates.sum()} duplicate rows in {table_name}")
-            print("Duplicate values:", df[duplicates].head())
-
-        if pk_subset:
-            before_drop = len(df)
-            df = df.drop_duplicates(subset=pk_subset, keep="first")
-            dropped = before_drop - len(df)
-            if dropped:
-                print(f"Removed {dropped} duplicate rows from {table_name} using keys {pk_subset}")
-
-        # Convert date columns
-        if date_columns:
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col]).dt.date
-
-        with self.connect() as conn:
-            # Filter rows against foreign key constraints if requested
-            if fk_filters:
-                for column, query in fk_filters.items():
-                    if column not in df.columns:
-                        continue
-                    allowed = {row[0] for row in conn.execute(query)}
-                    before = len(df)
-                    df = df[df[column].isin(allowed)]
-                    dropped = before - len(df)
-                    if dropped:
-                        print(f"Removed {dropped} rows from {table_name} due to missing FK values in {column}")
+        print(f"Loading {table_name} data from {parquet_path}...")
+        # Reuse the connection opened for the load phase so the page cache
+        # and bulk PRAGMA state stay hot across tables
+        conn = self.conn if self.conn is not None else self._bulk_connect()
+        # Run the DELETE and all inserts inside one transaction so each row
+        # doesn't pay its own journal + fsync cost
+        with conn:
             # First clear existing data
-            cursor = conn.cursor()
-            cursor.execute(f"DELETE FROM {table_name};")
-            conn.commit()
-            
-            # Then insert new data
-            df.to_sql(table_name, conn, if_exists='append', index=False)
-            print(f"Loaded {len(df)} rows into {table_name}")
-            conn.commit()
+            conn.execute(f"DELETE FROM {table_name};")
+
+            staging = None
+            staging_fk_columns = []
+            rows_read = 0
+            staged = 0
+            loaded = 0
+            # Stream the Parquet file in record batches so memory stays
+            # bounded at one batch regardless of file size; no CSV
+            # tokenization or string-to-number conversion on this path
+            for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=50_000):
+                chunk = batch.to_pandas()
+                rows_read += len(chunk)
+
+                # Convert date columns straight to ISO strings: SQLite stores
+                # dates as TEXT anyway, the explicit format skips per-call
+                # inference, and cache=True parses each distinct value once
+                if date_columns:
+                    for col in date_columns:
+                        if col in chunk.columns:
+                            chunk[col] = pd.to_datetime(
+                                chunk[col], format='ISO8601', cache=True
+                            ).dt.strftime('%Y-%m-%d')
+
+                fk_columns = [col for col in (fk_filters or {}) if col in chunk.columns]
+                if fk_columns:
+                    # Stage the rows and let SQLite's indexed B-trees do the
+                    # FK semi-join instead of materializing key sets in Python
+                    columns = ", ".join(chunk.columns)
+                    if staging is None:
+                        staging = f"{table_name}_staging"
+                        staging_fk_columns = fk_columns
+                        conn.execute(f"CREATE TEMP TABLE {staging} AS SELECT {columns} FROM {table_name} WHERE 0;")
+                    self._bulk_insert(conn, staging, chunk)
+                    staged += len(chunk)
+                else:
+                    loaded += self._bulk_insert(conn, table_name, chunk)
+
+            if staging is not None:
+                # The staging table carries no constraints, so duplicate keys
+                # are resolved here by the real table's OR IGNORE insert
+                conditions = " AND ".join(
+                    f"{col} IN ({fk_filters[col].rstrip().rstrip(';')})"
+                    for col in staging_fk_columns)
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO {table_name} ({columns}) "
+                    f"SELECT {columns} FROM {staging} WHERE {conditions};")
+                loaded = cursor.rowcount
+                dropped = staged - loaded
+                if dropped:
+                    print(f"Removed {dropped} rows from {table_name} (duplicate keys or missing FK values)")
+                conn.execute(f"DROP TABLE {staging};")
+            elif loaded < rows_read:
+                print(f"Removed {rows_read - loaded} duplicate-key rows from {table_name}")
+            print(f"Loaded {loaded} rows into {table_name}")
 
     def verify_tables(self):
         """Verify tables and row counts"""
         with self.connect() as conn:
-            tables = pd.read_sql("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' 
-                AND name NOT LIKE 'sqlite_%'
-                ORDER BY name
-            """, conn)
-            
             print("\nTable Verification:")
             print("=" * 50)
-            for _, row in tables.iterrows():
-                table_name = row['name']
-                count = pd.read_sql(f"SELECT COUNT(*) as count FROM {table_name}", conn).iloc[0]['count']
+            # Plain cursor calls; no point building DataFrames for metadata
+            for (table_name,) in conn.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type='table'
+                AND name NOT LIKE 'sqlite_%'
+                ORDER BY name
+            """).fetchall():
+                (count,) = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()
                 print(f"{table_name}: {count} rows")
 
 def main(recreate_tables=False):
@@ -279,7 +382,8 @@ def main(recreate_tables=False):
                 
                 conn.commit()
                 conn.execute("PRAGMA foreign_keys = ON;")
-            
+            db.close()
+
             # Recreate all tables
             db.create_tables()
         else:
@@ -288,22 +392,36 @@ def main(recreate_tables=False):
         
         # Rest of your code remains the same
         data_dir = Path("data/derived")
-        
+
+        # One tuned connection for the whole load phase instead of a cold
+        # start (and cold page cache) per table
+        db._bulk_connect()
+
         # Load data (order matters due to foreign key constraints)
-        db.load_data_from_csv("product", data_dir / "products_data.csv")
-        db.load_data_from_csv("warehouse", data_dir / "warehouse_data.csv")
-        db.load_data_from_csv("vendor", data_dir / "vendor_data.csv")
-        db.load_data_from_csv("purchase_order", data_dir / "purchase_order_data.csv", 
+        db.load_data_from_parquet("product", data_dir / "products_data.parquet")
+        db.load_data_from_parquet("warehouse", data_dir / "warehouse_data.parquet")
+        db.load_data_from_parquet("vendor", data_dir / "vendor_data.parquet")
+        db.load_data_from_parquet("purchase_order", data_dir / "purchase_order_data.parquet", 
                             ["po_date", "promised_delivery_date"])
-        db.load_data_from_csv("inventory", data_dir / "inventory_data.csv")
-        db.load_data_from_csv(
+        db.load_data_from_parquet("inventory", data_dir / "inventory_data.parquet")
+        db.load_data_from_parquet(
             "shipment",
-            data_dir / "shipment_data.csv",
+            data_dir / "shipment_data.parquet",
             ["event_timestamp", "estimated_delivery_date", "actual_delivery_date"],
             fk_filters={"order_id": "SELECT po_id FROM purchase_order;"},
         )
-        db.load_data_from_csv("demand", data_dir / "demand_data.csv", ["date"])
-        
+        db.load_data_from_parquet("demand", data_dir / "demand_data.parquet", ["date"])
+        db.finish_bulk_load()
+
+        # Build secondary indexes in one pass now that the data is in place
+        db.create_indexes()
+
+        # Rebuild planner statistics once after the bulk load; later
+        # connections keep them fresh via PRAGMA optimize on close
+        with db.connect() as conn:
+            conn.execute("ANALYZE;")
+        db.close()
+
         # Verify data
         db.verify_tables()
         print("\nDatabase setup completed successfully!")
@@ -1,54 +1,52 @@
+import multiprocessing
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-def prepare_products_data():
+def prepare_products_data(df):
     """Prepare products data"""
-    df = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    products = df[['sku_id', 'product_type']].drop_duplicates()
-    products.to_csv("data/derived/products_data.csv", index=False)
+    products = df.drop_duplicates(subset=['sku_id'])[['sku_id', 'product_type']]
+    products.to_parquet("data/derived/products_data.parquet", index=False)
 
-def prepare_warehouse_data():
+def prepare_warehouse_data(df):
     """Prepare warehouse data"""
-    df = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    warehouses = df[['warehouse_id', 'location']].drop_duplicates()
-    warehouses.to_csv("data/derived/warehouse_data.csv", index=False)
+    warehouses = df.drop_duplicates(subset=['warehouse_id'])[['warehouse_id', 'location']]
+    warehouses.to_parquet("data/derived/warehouse_data.parquet", index=False)
 
-def prepare_vendor_data():
+def prepare_vendor_data(df):
     """Prepare vendor data"""
-    df = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    vendors = df[['vendor_id', 'supplier_name', 'defect_rate', 'lead_time_days']].drop_duplicates()
+    vendors = df.drop_duplicates(subset=['vendor_id'])[
+        ['vendor_id', 'supplier_name', 'defect_rate', 'lead_time_days']]
     vendors['quality_score'] = 4.5  # Default quality score
-    vendors.to_csv("data/derived/vendor_data.csv", index=False)
+    vendors.to_parquet("data/derived/vendor_data.parquet", index=False)
 
-def prepare_purchase_order_data():
+def prepare_purchase_order_data(df):
     """Prepare purchase order data"""
     # Load POS data
-    pos = pd.read_csv("data/processed/supply_chain_pos.csv")
-    
+    pos = pd.read_csv("data/processed/supply_chain_pos.csv",
+                      engine='pyarrow', dtype_backend='pyarrow')
+
     # Augment with additional data if needed
-    aug = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    aug_po = aug[['po_id', 'inspection_results', 'manufacturing_costs']].drop_duplicates()
+    aug_po = df[['po_id', 'inspection_results', 'manufacturing_costs']].drop_duplicates()
     
     # Merge and clean up
     pos = pos.merge(aug_po, on='po_id', how='left')
     pos['actual_receipt_qty'] = pos['po_qty']  # Assuming all POs were received in full
     
     # Save
-    pos.to_csv("data/derived/purchase_order_data.csv", index=False)
+    pos.to_parquet("data/derived/purchase_order_data.parquet", index=False)
 
-def prepare_inventory_data():
+def prepare_inventory_data(df):
     """Prepare inventory data"""
     # This is a simplified example - adjust based on your actual inventory data
-    df = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    inventory = df[['warehouse_id', 'sku_id', 'stock_available', 'on_hand_qty', 
-                   'in_transit_qty', 'reorder_point', 'safety_stock']].drop_duplicates()
-    inventory.to_csv("data/derived/inventory_data.csv", index=False)
+    inventory = df.drop_duplicates(subset=['warehouse_id', 'sku_id'])[
+        ['warehouse_id', 'sku_id', 'stock_available', 'on_hand_qty',
+         'in_transit_qty', 'reorder_point', 'safety_stock']]
+    inventory.to_parquet("data/derived/inventory_data.parquet", index=False)
 
-def prepare_shipment_data():
+def prepare_shipment_data(df):
     """Prepare shipment data"""
-    df = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    
     # Filter out rows where order_id is null
     shipments = df[[
         'shipment_id', 'order_id', 'origin_lat', 'origin_lng', 
@@ -61,30 +59,50 @@ def prepare_shipment_data():
     if 'status' in shipments.columns:
         shipments['status'] = shipments['status'].fillna('pending')
     
-    shipments.to_csv("data/derived/shipment_data.csv", index=False)
+    shipments.to_parquet("data/derived/shipment_data.parquet", index=False)
 
-def prepare_demand_data():
+def prepare_demand_data(df):
     """Prepare demand data"""
-    df = pd.read_csv("data/processed/supply_chain_augmented.csv")
-    demand = df[[
+    demand = df.drop_duplicates(subset=['date', 'sku_id'])[[
         'date', 'sku_id', 'price', 'discount_percent', 'competitor_price',
         'web_traffic', 'units_sold'
-    ]].drop_duplicates()
-    demand.to_csv("data/derived/demand_data.csv", index=False)
+    ]]
+    demand.to_parquet("data/derived/demand_data.parquet", index=False)
+
+# Shared frame for the worker processes; forked children inherit it
+# copy-on-write, so the preparers run in parallel without pickling it
+_shared_df = None
+
+def _run_prep(prepare_fn):
+    """Run one preparer against the frame inherited from the parent"""
+    prepare_fn(_shared_df)
 
 def main():
+    global _shared_df
+
     # Create output directory
     Path("data/derived").mkdir(parents=True, exist_ok=True)
-    
-    # Prepare all data files
-    prepare_products_data()
-    prepare_warehouse_data()
-    prepare_vendor_data()
-    prepare_purchase_order_data()
-    prepare_inventory_data()
-    prepare_shipment_data()
-    prepare_demand_data()
-    
+
+    # Read the augmented file once and share it across all preparers instead
+    # of re-parsing it per output. Arrow's multi-threaded CSV reader is
+    # several times faster than the default single-threaded C engine.
+    _shared_df = pd.read_csv("data/processed/supply_chain_augmented.csv",
+                             engine='pyarrow', dtype_backend='pyarrow')
+
+    # Each preparer reads the shared frame and writes a distinct output, so
+    # they can all run concurrently
+    preparers = [
+        prepare_products_data,
+        prepare_warehouse_data,
+        prepare_vendor_data,
+        prepare_purchase_order_data,
+        prepare_inventory_data,
+        prepare_shipment_data,
+        prepare_demand_data,
+    ]
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("fork")) as executor:
+        list(executor.map(_run_prep, preparers))
+
     print("All data preparation completed!")
 
 if __name__ == "__main__":